@@ -8,16 +8,44 @@ from database import FlashcardDatabase
 from ollama_integration import get_ollama_client, is_ollama_available
 import json
 from datetime import datetime
+from functools import lru_cache
 
 app = Flask(__name__)
 db = FlashcardDatabase()
 
+DEFINE_WORD_PROMPT = "Define the {language} word '{word}' in {explain_in}. Be concise."
+
+@lru_cache(maxsize=256)
+def _cached_definition(word, language, explain_in, model):
+    """Look up a word definition, remembering recent results per model.
+
+    Raises LookupError when Ollama returns nothing so failures are not cached.
+    """
+    client = get_ollama_client()
+    prompt = DEFINE_WORD_PROMPT.format(language=language, word=word, explain_in=explain_in)
+    definition = client.explain_grammar(prompt)
+    if not definition:
+        raise LookupError(word)
+    return definition
+
 # CORS support for browser extension
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    # Let browsers cache preflight results for a day
+    'Access-Control-Max-Age': '86400',
+}
+
+@app.before_request
+def handle_preflight():
+    """Answer CORS preflight requests without dispatching to a view."""
+    if request.method == 'OPTIONS':
+        return '', 204
+
 @app.after_request
 def add_cors_headers(response):
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers.update(CORS_HEADERS)
     return response
 
 # Health check
@@ -68,20 +96,18 @@ def create_deck():
 def get_deck(deck_id):
     """Get deck details and statistics."""
     try:
-        decks = db.get_all_decks()
-        deck = next((d for d in decks if d['id'] == deck_id), None)
+        deck = db.get_deck(deck_id)
         
         if not deck:
             return jsonify({"success": False, "error": "Deck not found"}), 404
         
         stats = db.get_deck_statistics(deck_id)
-        cards = db.get_all_flashcards(deck_id)
         
         return jsonify({
             "success": True,
             "deck": deck,
             "stats": stats,
-            "card_count": len(cards)
+            "card_count": stats["total_cards"]
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
@@ -91,15 +117,17 @@ def get_deck(deck_id):
 def get_cards(deck_id):
     """Get all cards in a deck."""
     try:
-        cards = db.get_all_flashcards(deck_id)
+        cards = db.get_flashcards_projection(
+            deck_id, ("id", "question", "answer", "total_reviews", "correct_reviews", "easiness")
+        )
         cards_data = [
             {
-                "id": c.id,
-                "question": c.question,
-                "answer": c.answer,
-                "accuracy": round(c.get_accuracy(), 1) if c.total_reviews > 0 else 0,
-                "reviews": c.total_reviews,
-                "easiness": c.easiness
+                "id": c["id"],
+                "question": c["question"],
+                "answer": c["answer"],
+                "accuracy": round(c["correct_reviews"] / c["total_reviews"] * 100, 1) if c["total_reviews"] > 0 else 0,
+                "reviews": c["total_reviews"],
+                "easiness": c["easiness"]
             }
             for c in cards
         ]
@@ -118,11 +146,11 @@ def add_card(deck_id):
         if not question or not answer:
             return jsonify({"success": False, "error": "Question and answer are required"}), 400
         
-        card_id = db.add_flashcard(deck_id, question, answer)
-        if card_id:
+        card = db.add_flashcard(deck_id, question, answer)
+        if card:
             return jsonify({
                 "success": True,
-                "card_id": card_id,
+                "card_id": card.id,
                 "message": "Flashcard added successfully"
             })
         else:
@@ -140,7 +168,7 @@ def add_cards_batch(deck_id):
         if not cards:
             return jsonify({"success": False, "error": "No cards provided"}), 400
         
-        added = []
+        pairs = []
         failed = []
         
         for card in cards:
@@ -148,14 +176,17 @@ def add_cards_batch(deck_id):
             answer = card.get('answer', '').strip()
             
             if question and answer:
-                card_id = db.add_flashcard(deck_id, question, answer)
-                if card_id:
-                    added.append({"card_id": card_id, "question": question})
-                else:
-                    failed.append(question)
+                pairs.append((question, answer))
             else:
                 failed.append(card.get('question', 'Unknown'))
         
+        # Insert all valid cards in a single transaction
+        card_ids = db.add_flashcards_bulk(deck_id, pairs)
+        added = [
+            {"card_id": card_id, "question": question}
+            for card_id, (question, _) in zip(card_ids, pairs)
+        ]
+        
         return jsonify({
             "success": True,
             "added": len(added),
@@ -233,16 +264,12 @@ def define_word():
         if not word:
             return jsonify({"success": False, "error": "Word is required"}), 400
         
-        client = get_ollama_client()
-        
-        # Create language-aware prompt
-        prompt = f"Define the {language} word '{word}' in {explain_in}. Be concise."
-        definition = client.explain_grammar(prompt)
-        
-        if definition:
-            return jsonify({"success": True, "word": word, "definition": definition, "language": language})
-        else:
+        try:
+            definition = _cached_definition(word, language, explain_in, get_ollama_client().model)
+        except LookupError:
             return jsonify({"success": False, "error": "Could not define word"}), 400
+        
+        return jsonify({"success": True, "word": word, "definition": definition, "language": language})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
@@ -337,12 +364,15 @@ def get_imported_content():
     try:
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
+        after_created_at = request.args.get('after_created_at', None)
+        after_id = request.args.get('after_id', None, type=int)
+        language = request.args.get('language', None)
         content_type = request.args.get('type', None)
         
         if content_type:
             content = db.get_imported_content_by_type(content_type)
         else:
-            content = db.get_imported_content(limit, offset)
+            content = db.get_imported_content(limit, offset, after_created_at, after_id, language)
         
         return jsonify({"success": True, "content": content})
     except Exception as e:
@@ -464,4 +494,7 @@ if __name__ == '__main__':
     print("  GET /api/imported/stats")
     print("\nPress Ctrl+C to stop")
     
-    app.run(host='localhost', port=5000, debug=False)
+    try:
+        app.run(host='localhost', port=5000, debug=False)
+    finally:
+        db.close()
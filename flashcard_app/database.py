@@ -1,13 +1,157 @@
 import sqlite3
+import threading
+import time
+from typing import Iterator, Optional
 from flashcard import Flashcard
 from datetime import datetime
 
+# Columns that may be requested through get_flashcards_projection
+FLASHCARD_COLUMNS = frozenset({
+    "id", "deck_id", "question", "answer", "last_reviewed", "easiness",
+    "interval", "repetitions", "total_reviews", "correct_reviews", "next_due_ts"
+})
+
+# Connections kept open for reuse after their thread exits (Flask's dev server runs
+# every request on a new thread)
+_MAX_IDLE_CONNECTIONS = 4
+
+# INSERT ... RETURNING needs SQLite 3.35+; older libraries fall back to lastrowid
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Frequently used statements, kept as constants so sqlite3's statement cache always hits
+_SQL_FLASHCARD_FIELDS = (
+    "SELECT id, question, answer, last_reviewed, easiness, interval, repetitions, "
+    "total_reviews, correct_reviews FROM flashcards"
+)
+_SQL_GET_FLASHCARD = _SQL_FLASHCARD_FIELDS + " WHERE id = ?"
+_SQL_GET_ALL_FLASHCARDS = _SQL_FLASHCARD_FIELDS + " WHERE deck_id = ? ORDER BY id"
+_SQL_GET_DUE_FLASHCARDS = (
+    _SQL_FLASHCARD_FIELDS + " WHERE deck_id = ? AND next_due_ts <= ? "
+    "ORDER BY last_reviewed ASC, id ASC"
+)
+_SQL_DECKS_WITH_COUNTS = """
+    SELECT d.id, d.name, d.description, d.created_at,
+           COUNT(f.id) AS total_cards,
+           SUM(CASE WHEN f.next_due_ts <= ? THEN 1 ELSE 0 END) AS due_cards
+    FROM decks d
+    LEFT JOIN flashcards f ON f.deck_id = d.id"""
+# New cards are due immediately; next_due_ts = 0 keeps them inside the due range
+_SQL_INSERT_FLASHCARD = "INSERT INTO flashcards (deck_id, question, answer, next_due_ts) VALUES (?, ?, ?, 0)"
+_SQL_INSERT_FLASHCARD_RETURNING = (
+    _SQL_INSERT_FLASHCARD + " RETURNING id, question, answer, last_reviewed, easiness, interval, "
+    "repetitions, total_reviews, correct_reviews"
+)
+_SQL_INSERT_IMPORTED = (
+    "INSERT INTO imported_content "
+    "(content_type, content, context, title, url, language, tags, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+def _now_iso() -> str:
+    """Current local time as an ISO-8601 string, the format stored in created_at columns."""
+    return datetime.now().isoformat()
+
+def _deck_from_row(row) -> dict:
+    """Build a deck dict from a row selected with _SQL_DECKS_WITH_COUNTS."""
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "created_at": row[3],
+        "total_cards": row[4],
+        "due_cards": row[5]
+    }
+
+def _flashcard_from_row(row) -> Flashcard:
+    """Build a Flashcard from a row selected with _SQL_FLASHCARD_FIELDS."""
+    flashcard = Flashcard(row[1], row[2], card_id=row[0])
+    flashcard.last_reviewed = datetime.fromisoformat(row[3]) if row[3] else None
+    flashcard.easiness = row[4]
+    flashcard.interval = row[5]
+    flashcard.repetitions = row[6]
+    flashcard.total_reviews = row[7]
+    flashcard.correct_reviews = row[8]
+    return flashcard
+
+def _imported_from_row(row: sqlite3.Row) -> dict:
+    """Convert an imported_content row into the dict shape used by the API."""
+    item = dict(row)
+    item["processed"] = bool(item["processed"])
+    item["tags"] = item["tags"] or ""
+    return item
+
 class FlashcardDatabase:
     def __init__(self, db_name="flashcards.db"):
-        # check_same_thread=False allows the connection to be used across Flask request threads
-        # This is safe for this application since we're not doing concurrent writes
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
-        self._create_tables()
+        self.db_name = db_name
+        # Each thread (Flask request threads, GUI workers) holds its own connection so
+        # reads run side by side under WAL; concurrent writers wait on busy_timeout.
+        # When a thread exits its connection goes back to an idle pool for the next one.
+        self._local = threading.local()
+        self._connections = []  # (owning thread, connection)
+        self._idle_connections = []
+        self._connections_lock = threading.Lock()
+        # An in-memory database only exists inside the connection that created it
+        self._shared_conn = self._connect() if db_name == ":memory:" else None
+        # sqlite3 does not open a transaction for DDL on its own, so without an explicit
+        # BEGIN every CREATE/ALTER would be committed (and synced) separately
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._create_tables()
+            schema_changed = self._migrate_schema()
+            schema_changed |= self._create_indexes()
+            # New columns and indexes have no planner statistics until ANALYZE runs
+            if schema_changed or not self._has_statistics():
+                self.analyze()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection for the calling thread, opened on first use."""
+        if self._shared_conn is not None:
+            return self._shared_conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Give the calling thread a configured connection, reusing an idle one if possible."""
+        with self._connections_lock:
+            self._reclaim_connections()
+            conn = self._idle_connections.pop() if self._idle_connections else None
+        if conn is None:
+            # check_same_thread=False so a connection can move to another thread once
+            # its owner has exited; it is never used by two threads at the same time
+            conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=256)
+            self._configure_connection(conn)
+        with self._connections_lock:
+            self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _reclaim_connections(self):
+        """Return connections of exited threads to the idle pool. Caller holds the lock."""
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            elif len(self._idle_connections) < _MAX_IDLE_CONNECTIONS:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle_connections.append(conn)
+            else:
+                conn.close()
+        self._connections = alive
+
+    def _configure_connection(self, conn: sqlite3.Connection):
+        # WAL turns each commit into an append and lets readers run alongside the writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        # Required for the ON DELETE CASCADE clauses in the schema to take effect
+        conn.execute("PRAGMA foreign_keys=ON")
+        # Wait for a competing writer instead of failing with "database is locked"
+        conn.execute("PRAGMA busy_timeout=5000")
 
     def _create_tables(self):
         cursor = self.conn.cursor()
@@ -35,6 +179,7 @@ class FlashcardDatabase:
                 repetitions INTEGER DEFAULT 0,
                 total_reviews INTEGER DEFAULT 0,
                 correct_reviews INTEGER DEFAULT 0,
+                next_due_ts INTEGER NOT NULL DEFAULT 0,  -- epoch seconds; 0 = never reviewed
                 FOREIGN KEY (deck_id) REFERENCES decks (id) ON DELETE CASCADE
             )
         """)
@@ -99,16 +244,86 @@ class FlashcardDatabase:
                 setting_value TEXT NOT NULL
             )
         """)
+
+    def _migrate_schema(self) -> bool:
+        """Bring an older database up to the current schema. Returns True if anything changed."""
+        cursor = self.conn.cursor()
+        changed = False
         
-        self.conn.commit()
+        # Read the columns of every table in one statement rather than one PRAGMA per table
+        cursor.execute("""
+            SELECT m.name, p.name FROM sqlite_master m, pragma_table_info(m.name) p
+            WHERE m.type = 'table'
+        """)
+        existing = {}
+        for table, column in cursor.fetchall():
+            existing.setdefault(table, set()).add(column)
+        
+        # Databases created before next_due_ts existed: add it and derive it from
+        # last_reviewed so due checks are a plain range on idx_flashcards_next_due
+        if "next_due_ts" not in existing["flashcards"]:
+            changed = True
+            cursor.execute("ALTER TABLE flashcards ADD COLUMN next_due_ts INTEGER NOT NULL DEFAULT 0")
+            # last_reviewed holds local time, so convert it to UTC before taking the epoch
+            cursor.execute("""
+                UPDATE flashcards
+                SET next_due_ts = CAST(strftime('%s', last_reviewed, 'utc') AS INTEGER) + interval * 86400
+                WHERE last_reviewed IS NOT NULL AND last_reviewed != ''
+            """)
+        
+        return changed
+
+    def _create_indexes(self) -> bool:
+        """Create any missing indexes. Returns True if one was added."""
+        cursor = self.conn.cursor()
+        list_indexes = "SELECT name FROM sqlite_master WHERE type = 'index'"
+        before = {name for name, in cursor.execute(list_indexes)}
+        
+        # Backs the due-card lookups, which filter on deck and next due time; per-deck
+        # lookups use its leading column, so deck_id needs no index of its own
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_flashcards_next_due "
+            "ON flashcards(deck_id, next_due_ts)"
+        )
+        
+        # Imported content is listed newest first, optionally filtered by type
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_imported_created ON imported_content(created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_imported_type ON imported_content(content_type, created_at)")
+        # Per-language pages seek straight to the language and walk it in (created_at, id) order
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_imported_language "
+            "ON imported_content(language, created_at, id)"
+        )
+        
+        # Explanations are looked up per imported sentence and language
+        # (word_definitions is already covered by its UNIQUE constraint)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sentence_explanations_content "
+            "ON sentence_explanations(imported_content_id, explanation_language)"
+        )
+        
+        return bool({name for name, in cursor.execute(list_indexes)} - before)
+
+    def _has_statistics(self) -> bool:
+        """Whether ANALYZE has recorded anything yet (it skips tables that were empty)."""
+        cursor = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if cursor.fetchone() is None:
+            return False
+        return self.conn.execute("SELECT 1 FROM sqlite_stat1 LIMIT 1").fetchone() is not None
+
+    def analyze(self):
+        """Refresh the query planner statistics (sqlite_stat1) for every table and index."""
+        # Outside a transaction ANALYZE commits on its own; during startup it joins the schema one
+        self.conn.execute("ANALYZE")
 
     def create_deck(self, name: str, description: str = "") -> int:
         """Create a new deck and return its ID."""
-        cursor = self.conn.cursor()
         try:
-            cursor.execute(
+            cursor = self.conn.execute(
                 "INSERT INTO decks (name, created_at, description) VALUES (?, ?, ?)",
-                (name, datetime.now().isoformat(), description)
+                (name, _now_iso(), description)
             )
             self.conn.commit()
             return cursor.lastrowid
@@ -117,120 +332,97 @@ class FlashcardDatabase:
 
     def get_all_decks(self) -> list[dict]:
         """Get all decks with their statistics."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT id, name, description, created_at FROM decks ORDER BY name")
-        decks = []
-        for row in cursor.fetchall():
-            deck_id = row[0]
-            # Count total cards
-            cursor.execute("SELECT COUNT(*) FROM flashcards WHERE deck_id = ?", (deck_id,))
-            total = cursor.fetchone()[0]
-            # Count due cards (simplified - cards with no review or old reviews)
-            try:
-                cursor.execute(
-                    "SELECT COUNT(*) FROM flashcards WHERE deck_id = ? AND last_reviewed IS NULL",
-                    (deck_id,)
-                )
-                due = cursor.fetchone()[0]
-            except:
-                due = 0
-            
-            decks.append({
-                "id": row[0],
-                "name": row[1],
-                "description": row[2],
-                "created_at": row[3],
-                "total_cards": total,
-                "due_cards": due
-            })
-        return decks
+        cursor = self.conn.execute(
+            _SQL_DECKS_WITH_COUNTS + " GROUP BY d.id ORDER BY d.name",
+            (int(time.time()),)
+        )
+        return [_deck_from_row(row) for row in cursor]
+
+    def get_deck(self, deck_id: int) -> Optional[dict]:
+        """Get one deck with its statistics, or None if it does not exist."""
+        cursor = self.conn.execute(
+            _SQL_DECKS_WITH_COUNTS + " WHERE d.id = ? GROUP BY d.id",
+            (int(time.time()), deck_id)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return _deck_from_row(row)
 
     def delete_deck(self, deck_id: int) -> bool:
         """Delete a deck and all its flashcards."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+        cursor = self.conn.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
         self.conn.commit()
         return cursor.rowcount > 0
 
     def add_flashcard(self, deck_id: int, question: str, answer: str) -> Flashcard:
         """Add a flashcard to a deck."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO flashcards (deck_id, question, answer) VALUES (?, ?, ?)",
-            (deck_id, question, answer)
-        )
-        flashcard_id = cursor.lastrowid
+        if _HAS_RETURNING:
+            # The new row, schema defaults included, comes back from the INSERT itself
+            row = self.conn.execute(_SQL_INSERT_FLASHCARD_RETURNING, (deck_id, question, answer)).fetchone()
+            self.conn.commit()
+            return _flashcard_from_row(row)
+        cursor = self.conn.execute(_SQL_INSERT_FLASHCARD, (deck_id, question, answer))
         self.conn.commit()
-        return self.get_flashcard(flashcard_id)
+        # A new card only carries the schema defaults, which Flashcard already starts with
+        return Flashcard(question, answer, card_id=cursor.lastrowid)
+
+    def add_flashcards_bulk(self, deck_id: int, pairs: list[tuple[str, str]]) -> list[int]:
+        """Add several (question, answer) flashcards to a deck in one transaction.
+
+        Returns the new flashcard IDs in the same order as the pairs.
+        """
+        card_ids = []
+        with self.conn:
+            cursor = self.conn.cursor()
+            for question, answer in pairs:
+                cursor.execute(_SQL_INSERT_FLASHCARD, (deck_id, question, answer))
+                card_ids.append(cursor.lastrowid)
+        return card_ids
 
     def get_flashcard(self, flashcard_id: int) -> Flashcard:
         """Get a specific flashcard."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT id, question, answer, last_reviewed, easiness, interval, repetitions, total_reviews, correct_reviews FROM flashcards WHERE id = ?",
-            (flashcard_id,)
-        )
+        cursor = self.conn.execute(_SQL_GET_FLASHCARD, (flashcard_id,))
         row = cursor.fetchone()
         if not row:
             return None
-
-        flashcard = Flashcard(row[1], row[2], card_id=row[0])
-        flashcard.last_reviewed = datetime.fromisoformat(row[3]) if row[3] else None
-        flashcard.easiness = row[4]
-        flashcard.interval = row[5]
-        flashcard.repetitions = row[6]
-        flashcard.total_reviews = row[7]
-        flashcard.correct_reviews = row[8]
-        return flashcard
+        return _flashcard_from_row(row)
 
     def get_all_flashcards(self, deck_id: int) -> list[Flashcard]:
         """Get all flashcards in a deck."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT id, question, answer, last_reviewed, easiness, interval, repetitions, total_reviews, correct_reviews FROM flashcards WHERE deck_id = ? ORDER BY id",
+        cursor = self.conn.execute(_SQL_GET_ALL_FLASHCARDS, (deck_id,))
+        return [_flashcard_from_row(row) for row in cursor]
+
+    def get_flashcards_projection(self, deck_id: int,
+                                  fields: tuple = ("id", "question", "answer", "total_reviews", "easiness")) -> list[dict]:
+        """Get selected flashcard columns as plain dicts, without building Flashcard objects."""
+        unknown = set(fields) - FLASHCARD_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown flashcard fields: {', '.join(sorted(unknown))}")
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(fields)} FROM flashcards WHERE deck_id = ? ORDER BY id",
             (deck_id,)
         )
-        flashcards = []
-        for row in cursor.fetchall():
-            flashcard = Flashcard(row[1], row[2], card_id=row[0])
-            flashcard.last_reviewed = datetime.fromisoformat(row[3]) if row[3] else None
-            flashcard.easiness = row[4]
-            flashcard.interval = row[5]
-            flashcard.repetitions = row[6]
-            flashcard.total_reviews = row[7]
-            flashcard.correct_reviews = row[8]
-            flashcards.append(flashcard)
-        return flashcards
+        return [dict(zip(fields, row)) for row in cursor]
+
+    def iter_due_flashcards(self, deck_id: int) -> Iterator[Flashcard]:
+        """Yield flashcards due for review in a deck, fetching rows as they are consumed."""
+        cursor = self.conn.execute(_SQL_GET_DUE_FLASHCARDS, (deck_id, int(time.time())))
+        for row in cursor:
+            yield _flashcard_from_row(row)
 
     def get_due_flashcards(self, deck_id: int) -> list[Flashcard]:
         """Get flashcards due for review in a deck."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT id, question, answer, last_reviewed, easiness, interval, repetitions, total_reviews, correct_reviews FROM flashcards
-            WHERE deck_id = ? AND (last_reviewed IS NULL OR
-                  (strftime('%s', 'now') - strftime('%s', last_reviewed)) / 86400 >= interval)
-            ORDER BY last_reviewed ASC, id ASC
-        """, (deck_id,))
-        
-        flashcards = []
-        for row in cursor.fetchall():
-            flashcard = Flashcard(row[1], row[2], card_id=row[0])
-            flashcard.last_reviewed = datetime.fromisoformat(row[3]) if row[3] else None
-            flashcard.easiness = row[4]
-            flashcard.interval = row[5]
-            flashcard.repetitions = row[6]
-            flashcard.total_reviews = row[7]
-            flashcard.correct_reviews = row[8]
-            flashcards.append(flashcard)
-        return flashcards
+        return list(self.iter_due_flashcards(deck_id))
 
     def update_flashcard(self, flashcard):
         # Update a flashcard's stats
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE flashcards SET last_reviewed = ?, easiness = ?, interval = ?, repetitions = ?, total_reviews = ?, correct_reviews = ? WHERE id = ?",
+        reviewed_ts = int(flashcard.last_reviewed.timestamp()) if flashcard.last_reviewed else None
+        cursor = self.conn.execute(
+            "UPDATE flashcards SET last_reviewed = ?, next_due_ts = ?, easiness = ?, interval = ?, repetitions = ?, total_reviews = ?, correct_reviews = ? WHERE id = ?",
             (
                 flashcard.last_reviewed.isoformat() if flashcard.last_reviewed else None,
+                reviewed_ts + flashcard.interval * 86400 if reviewed_ts is not None else 0,
                 flashcard.easiness,
                 flashcard.interval,
                 flashcard.repetitions,
@@ -244,27 +436,20 @@ class FlashcardDatabase:
 
     def delete_flashcard(self, flashcard_id: int) -> bool:
         """Delete a flashcard."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM flashcards WHERE id = ?", (flashcard_id,))
+        cursor = self.conn.execute("DELETE FROM flashcards WHERE id = ?", (flashcard_id,))
         self.conn.commit()
         return cursor.rowcount > 0
 
     def get_deck_statistics(self, deck_id: int) -> dict:
         """Get statistics for a deck."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM flashcards WHERE deck_id = ?", (deck_id,))
-        total = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT SUM(correct_reviews), SUM(total_reviews) FROM flashcards WHERE deck_id = ?", (deck_id,))
-        row = cursor.fetchone()
-        correct = row[0] or 0
-        total_reviews = row[1] or 0
-        
-        cursor.execute(
-            "SELECT COUNT(*) FROM flashcards WHERE deck_id = ? AND (last_reviewed IS NULL OR (strftime('%s', 'now') - strftime('%s', last_reviewed)) / 86400 >= interval)",
-            (deck_id,)
-        )
-        due = cursor.fetchone()[0]
+        cursor = self.conn.execute("""
+            SELECT COUNT(*),
+                   COALESCE(SUM(correct_reviews), 0),
+                   COALESCE(SUM(total_reviews), 0),
+                   COALESCE(SUM(CASE WHEN next_due_ts <= ? THEN 1 ELSE 0 END), 0)
+            FROM flashcards WHERE deck_id = ?
+        """, (int(time.time()), deck_id))
+        total, correct, total_reviews, due = cursor.fetchone()
         
         return {
             "total_cards": total,
@@ -281,19 +466,16 @@ class FlashcardDatabase:
                            tags: str = "") -> int:
         """Add imported content from browser extension."""
         print(f'\n[DB] add_imported_content called: type={content_type}, content={content[:50]}...', flush=True)
-        cursor = self.conn.cursor()
         try:
             print(f'[DB] Executing INSERT...', flush=True)
-            cursor.execute("""
-                INSERT INTO imported_content 
-                (content_type, content, context, title, url, language, created_at, tags)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (content_type, content, context, title, url, language, 
-                  datetime.now().isoformat(), tags))
+            params = (content_type, content, context, title, url, language, tags, _now_iso())
+            if _HAS_RETURNING:
+                row_id = self.conn.execute(_SQL_INSERT_IMPORTED + " RETURNING id", params).fetchone()[0]
+            else:
+                row_id = self.conn.execute(_SQL_INSERT_IMPORTED, params).lastrowid
             print(f'[DB] INSERT executed', flush=True)
             self.conn.commit()
             print(f'[DB] COMMIT successful', flush=True)
-            row_id = cursor.lastrowid
             print(f'[DB] Returned row ID: {row_id}', flush=True)
             return row_id
         except Exception as e:
@@ -302,94 +484,102 @@ class FlashcardDatabase:
             traceback.print_exc()
             raise
 
-    def get_imported_content(self, limit: int = 50, offset: int = 0) -> list[dict]:
-        """Get imported content for review."""
+    def get_imported_content(self, limit: int = 50, offset: int = 0,
+                             after_created_at: str = None, after_id: int = None,
+                             language: str = None) -> list[dict]:
+        """Get imported content for review, newest first.
+
+        Pass the created_at and id of the last row already shown to fetch the
+        next page by seeking on the index; offset is only used without them.
+        """
+        conditions, params = [], []
+        if language is not None:
+            conditions.append("language = ?")
+            params.append(language)
+        if after_created_at is not None and after_id is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend((after_created_at, after_id))
+            offset = 0
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
         cursor = self.conn.cursor()
-        cursor.execute("""
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"""
             SELECT id, content_type, content, context, title, url, language, created_at, processed, tags
-            FROM imported_content 
-            ORDER BY created_at DESC 
+            FROM imported_content
+            {where}
+            ORDER BY created_at DESC, id DESC
             LIMIT ? OFFSET ?
-        """, (limit, offset))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                "id": row[0],
-                "content_type": row[1],
-                "content": row[2],
-                "context": row[3],
-                "title": row[4],
-                "url": row[5],
-                "language": row[6],
-                "created_at": row[7],
-                "processed": bool(row[8]),
-                "tags": row[9] or ""
-            })
-        return results
+        """, (*params, limit, offset))
+        return [_imported_from_row(row) for row in cursor]
 
     def get_imported_content_by_type(self, content_type: str) -> list[dict]:
         """Get imported content by type (word, sentence, phrase)."""
         cursor = self.conn.cursor()
+        cursor.row_factory = sqlite3.Row
         cursor.execute("""
             SELECT id, content_type, content, context, title, url, language, created_at, processed, tags
             FROM imported_content 
             WHERE content_type = ?
             ORDER BY created_at DESC
         """, (content_type,))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                "id": row[0],
-                "content_type": row[1],
-                "content": row[2],
-                "context": row[3],
-                "title": row[4],
-                "url": row[5],
-                "language": row[6],
-                "created_at": row[7],
-                "processed": bool(row[8]),
-                "tags": row[9] or ""
-            })
-        return results
+        return [_imported_from_row(row) for row in cursor]
 
     def mark_content_processed(self, content_id: int) -> bool:
         """Mark imported content as processed (converted to flashcards)."""
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE imported_content SET processed = 1 WHERE id = ?", (content_id,))
+        cursor = self.conn.execute("UPDATE imported_content SET processed = 1 WHERE id = ?", (content_id,))
         self.conn.commit()
         return cursor.rowcount > 0
 
     def delete_imported_content(self, content_id: int) -> bool:
         """Delete imported content."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM imported_content WHERE id = ?", (content_id,))
+        cursor = self.conn.execute("DELETE FROM imported_content WHERE id = ?", (content_id,))
         self.conn.commit()
         return cursor.rowcount > 0
 
     def get_imported_content_stats(self) -> dict:
         """Get statistics about imported content."""
-        cursor = self.conn.cursor()
-        
-        # Total imported items
-        cursor.execute("SELECT COUNT(*) FROM imported_content")
-        total = cursor.fetchone()[0]
-        
-        # By type
-        cursor.execute("SELECT content_type, COUNT(*) FROM imported_content GROUP BY content_type")
-        type_counts = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor = self.conn.execute("""
+            SELECT content_type, processed, COUNT(*)
+            FROM imported_content
+            GROUP BY content_type, processed
+        """)
         
-        # Processed vs unprocessed
-        cursor.execute("SELECT processed, COUNT(*) FROM imported_content GROUP BY processed")
-        processed_counts = {bool(row[0]): row[1] for row in cursor.fetchall()}
+        type_counts = {}
+        processed_counts = {True: 0, False: 0}
+        for content_type, processed, count in cursor:
+            type_counts[content_type] = type_counts.get(content_type, 0) + count
+            processed_counts[bool(processed)] += count
         
         return {
-            "total_imported": total,
+            "total_imported": processed_counts[True] + processed_counts[False],
             "by_type": type_counts,
-            "processed": processed_counts.get(True, 0),
-            "unprocessed": processed_counts.get(False, 0)
+            "processed": processed_counts[True],
+            "unprocessed": processed_counts[False]
         }
 
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        """Close the calling thread's connection and every idle one.
+
+        Connections still held by other running threads are left alone; they go
+        back to the pool when those threads exit.
+        """
+        current = threading.current_thread()
+        with self._connections_lock:
+            self._reclaim_connections()
+            closing = self._idle_connections
+            self._idle_connections = []
+            remaining = []
+            for thread, conn in self._connections:
+                if thread is current:
+                    closing.append(conn)
+                else:
+                    remaining.append((thread, conn))
+            self._connections = remaining
+        for conn in closing:
+            try:
+                # Lets SQLite re-analyze tables whose statistics the session showed to be stale
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                print(f'[DB] PRAGMA optimize failed: {e}', flush=True)
+            conn.close()
+        self._local.conn = None
\ No newline at end of file
@@ -1,12 +1,10 @@
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext
 from database import FlashcardDatabase
-from spaced_repetition import get_due_flashcards, get_next_review_date
-from flashcard import Flashcard
-from datetime import datetime
-from ollama_integration import get_ollama_client, is_ollama_available, OllamaThreadedQuery
+from spaced_repetition import get_next_review_date
+from ollama_integration import get_ollama_client
 from study_manager import StudyManager
-from study_gui import StudyGUI
 
 class FlashcardApp:
     def __init__(self, root):
@@ -16,12 +14,16 @@ class FlashcardApp:
         self.root.configure(bg="#f0f0f0")
         
         self.db = FlashcardDatabase()
-        self.ollama_client = get_ollama_client()
-        self.ollama_available = is_ollama_available()
+        # Ollama is probed in the background; None means the check is still running
+        self.ollama_client = None
+        self.ollama_available = None
+        self.ollama_status_label = None
+        self._ollama_buttons = []
         
         # Initialize study manager
         self.study_manager = StudyManager(self.db, self.ollama_client)
-        self.study_gui = StudyGUI(self.root, self.db, self.study_manager)
+        # The Study Center is only imported and built the first time it is opened
+        self.study_gui = None
         
         self.current_deck_id = None
         self.current_flashcards = []
@@ -30,13 +32,58 @@ class FlashcardApp:
         self.answer_revealed = False
         
         # Style configuration with better button sizing
-        self.style = ttk.Style()
-        self.style.theme_use("clam")
-        self.style.configure("TButton", font=("Arial", 11), padding=10)
-        self.style.configure("Large.TButton", font=("Arial", 12), padding=15)
-        self.style.configure("TLabel", font=("Arial", 10))
-        
+        # ttk styles belong to the Tk interpreter, so each new root is styled once;
+        # the clam theme doubles as the marker that this one already is
+        self.style = ttk.Style(self.root)
+        if self.style.theme_use() != "clam":
+            self.style.theme_use("clam")
+            self.style.configure("TButton", font=("Arial", 11), padding=10)
+            self.style.configure("Large.TButton", font=("Arial", 12), padding=15)
+            self.style.configure("TLabel", font=("Arial", 10))
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_window_close)
         self.show_deck_selection()
+        threading.Thread(target=self._probe_ollama, daemon=True).start()
+    
+    def on_window_close(self):
+        """Close the database (which runs PRAGMA optimize) before the window goes away."""
+        self.db.close()
+        self.root.destroy()
+    
+    def _probe_ollama(self):
+        """Connect to Ollama off the Tk thread, report back via after(), then warm the model."""
+        client = get_ollama_client()
+        available = client.is_available()
+        if available and self.study_manager.ollama_model:
+            client.set_model(self.study_manager.ollama_model)
+        self.root.after(0, self._on_ollama_probed, client, available)
+        if available:
+            client.preload_model(keep_alive="30m")
+    
+    def _on_ollama_probed(self, client, available):
+        """Store the probe result and refresh whatever is on screen that depends on it."""
+        self.ollama_client = client
+        self.ollama_available = available
+        self.study_manager.ollama_client = client
+        if self.study_gui is not None:
+            self.study_gui.set_ollama_available(available)
+        if self.ollama_status_label is not None and self.ollama_status_label.winfo_exists():
+            self._update_ollama_status()
+        if not available:
+            # The deck menu offers the Ollama tools while the probe runs; drop them now
+            for button in self._ollama_buttons:
+                if button.winfo_exists():
+                    button.destroy()
+        self._ollama_buttons = []
+    
+    def _update_ollama_status(self):
+        """Show the current Ollama state in the title bar label."""
+        if self.ollama_available is None:
+            self.ollama_status_label.config(text="… Checking Ollama", foreground="gray", font=("Arial", 10))
+        elif self.ollama_available:
+            self.ollama_status_label.config(text="✓ Ollama Connected", foreground="green", font=("Arial", 10, "bold"))
+        else:
+            self.ollama_status_label.config(text="⚠ Ollama Offline", foreground="red", font=("Arial", 10))
     
     def clear_window(self):
         """Clear all widgets from the window."""
@@ -59,11 +106,9 @@ class FlashcardApp:
         title.pack(side="left")
         
         # Ollama status indicator
-        if self.ollama_available:
-            ollama_status = ttk.Label(title_frame, text="✓ Ollama Connected", foreground="green", font=("Arial", 10, "bold"))
-        else:
-            ollama_status = ttk.Label(title_frame, text="⚠ Ollama Offline", foreground="red", font=("Arial", 10))
-        ollama_status.pack(side="right", padx=10)
+        self.ollama_status_label = ttk.Label(title_frame)
+        self.ollama_status_label.pack(side="right", padx=10)
+        self._update_ollama_status()
         
         # Create deck button - LARGER
         create_btn = ttk.Button(frame, text="Create New Deck", command=self.create_deck_dialog, style="Large.TButton")
@@ -96,28 +141,32 @@ class FlashcardApp:
         btn_frame = ttk.Frame(frame)
         btn_frame.pack(fill="x", pady=20)
         
-        open_btn = ttk.Button(btn_frame, text="Open Deck", command=self.open_deck, style="Large.TButton")
-        open_btn.pack(side="left", padx=8, fill="both", expand=True)
-        
-        stats_btn = ttk.Button(btn_frame, text="View Statistics", command=self.view_deck_stats, style="Large.TButton")
-        stats_btn.pack(side="left", padx=8, fill="both", expand=True)
-        
-        delete_btn = ttk.Button(btn_frame, text="Delete Deck", command=self.delete_deck, style="Large.TButton")
-        delete_btn.pack(side="left", padx=8, fill="both", expand=True)
+        self._add_button_row(btn_frame, (
+            ("Open Deck", self.open_deck),
+            ("View Statistics", self.view_deck_stats),
+            ("Delete Deck", self.delete_deck),
+        ), padx=8)
         
         self.refresh_decks()
     
     def refresh_decks(self):
-        """Refresh the decks list."""
-        for item in self.decks_tree.get_children():
-            self.decks_tree.delete(item)
+        """Refresh the decks list, touching only rows that were added, changed or removed."""
+        stale = set(self.decks_tree.get_children())
         
         decks = self.db.get_all_decks()
-        for deck in decks:
-            self.decks_tree.insert(
-                "", "end", text=deck["name"],
-                values=(deck["total_cards"], deck["due_cards"])
-            )
+        for index, deck in enumerate(decks):
+            # The deck id doubles as the row id, so selections map straight back to a deck
+            iid = str(deck["id"])
+            values = (deck["total_cards"], deck["due_cards"])
+            if iid in stale:
+                stale.discard(iid)
+                self.decks_tree.item(iid, text=deck["name"], values=values)
+                self.decks_tree.move(iid, "", index)
+            else:
+                self.decks_tree.insert("", index, iid=iid, text=deck["name"], values=values)
+        
+        if stale:
+            self.decks_tree.delete(*stale)
     
     def create_deck_dialog(self):
         """Show dialog to create a new deck."""
@@ -158,21 +207,15 @@ class FlashcardApp:
             messagebox.showwarning("Warning", "Please select a deck")
             return
         
-        deck_name = self.decks_tree.item(selection[0])["text"]
-        decks = self.db.get_all_decks()
-        for deck in decks:
-            if deck["name"] == deck_name:
-                self.current_deck_id = deck["id"]
-                self.show_deck_menu()
-                break
+        self.current_deck_id = int(selection[0])
+        self.show_deck_menu()
     
     def show_deck_menu(self):
         """Show the deck management menu."""
         self.clear_window()
         
         deck_stats = self.db.get_deck_statistics(self.current_deck_id)
-        decks = self.db.get_all_decks()
-        deck_name = next(d["name"] for d in decks if d["id"] == self.current_deck_id)
+        deck_name = self.db.get_deck(self.current_deck_id)["name"]
         
         frame = ttk.Frame(self.root, padding="20")
         frame.pack(fill="both", expand=True)
@@ -185,30 +228,40 @@ class FlashcardApp:
         stats_frame = ttk.LabelFrame(frame, text="Statistics", padding="15")
         stats_frame.pack(fill="x", pady=15)
         
-        stats_text = f"""Total Cards: {deck_stats['total_cards']}  |  Due Today: {deck_stats['due_cards']}
-Total Reviews: {deck_stats['total_reviews']}  |  Accuracy: {deck_stats['overall_accuracy']:.1f}%"""
-        
-        ttk.Label(stats_frame, text=stats_text, font=("Arial", 11)).pack()
+        self.deck_stats_label = ttk.Label(stats_frame, text=self._deck_stats_text(deck_stats), font=("Arial", 11))
+        self.deck_stats_label.pack()
         
         # Buttons - LARGER AND BETTER SPACED
         btn_frame = ttk.Frame(frame)
         btn_frame.pack(fill="x", pady=25)
         
-        review_btn = ttk.Button(btn_frame, text="Review Cards", command=self.start_review, style="Large.TButton")
-        review_btn.pack(side="left", padx=10, fill="both", expand=True)
-        
-        add_btn = ttk.Button(btn_frame, text="Add Card", command=self.add_card_dialog, style="Large.TButton")
-        add_btn.pack(side="left", padx=10, fill="both", expand=True)
-        
-        view_btn = ttk.Button(btn_frame, text="View All Cards", command=self.view_all_cards, style="Large.TButton")
-        view_btn.pack(side="left", padx=10, fill="both", expand=True)
-        
-        if self.ollama_available:
-            grammar_btn = ttk.Button(btn_frame, text="Grammar Help", command=self.show_grammar_help, style="Large.TButton")
-            grammar_btn.pack(side="left", padx=10, fill="both", expand=True)
-        
-        back_btn = ttk.Button(btn_frame, text="Back", command=self.show_deck_selection, style="Large.TButton")
-        back_btn.pack(side="left", padx=10, fill="both", expand=True)
+        self._add_button_row(btn_frame, (
+            ("Review Cards", self.start_review),
+            ("Add Card", self.add_card_dialog),
+            ("View All Cards", self.view_all_cards),
+        ), padx=10)
+        # Shown while the startup probe is still running (None); the handlers ask the
+        # user to wait, and _on_ollama_probed removes them if Ollama turns out offline
+        if self.ollama_available is not False:
+            self._ollama_buttons = self._add_button_row(btn_frame, (
+                ("Grammar Help", self.show_grammar_help),
+                ("Suggest Words", self.suggest_difficult_words),
+            ), padx=10)
+        self._add_button_row(btn_frame, (("Back", self.show_deck_selection),), padx=10)
+    
+    def _deck_stats_text(self, deck_stats):
+        """Format the summary shown in the deck menu's Statistics box."""
+        return f"""Total Cards: {deck_stats['total_cards']}  |  Due Today: {deck_stats['due_cards']}
+Total Reviews: {deck_stats['total_reviews']}  |  Accuracy: {deck_stats['overall_accuracy']:.1f}%"""
+    
+    def _add_button_row(self, parent, buttons, padx):
+        """Pack (text, command) pairs as an evenly stretched row of large buttons and return them."""
+        created = []
+        for text, command in buttons:
+            button = ttk.Button(parent, text=text, command=command, style="Large.TButton")
+            button.pack(side="left", padx=padx, fill="both", expand=True)
+            created.append(button)
+        return created
     
     def add_card_dialog(self):
         """Show dialog to add a new card."""
@@ -237,7 +290,9 @@ Total Reviews: {deck_stats['total_reviews']}  |  Accuracy: {deck_stats['overall_
             self.db.add_flashcard(self.current_deck_id, question, answer)
             messagebox.showinfo("Success", "Card added!")
             dialog.destroy()
-            self.show_deck_menu()
+            # The deck menu is still showing; only its statistics changed
+            deck_stats = self.db.get_deck_statistics(self.current_deck_id)
+            self.deck_stats_label.config(text=self._deck_stats_text(deck_stats))
         
         ttk.Button(dialog, text="Save", command=save_card).pack(pady=10)
     
@@ -390,9 +445,8 @@ Total Reviews: {deck_stats['total_reviews']}  |  Accuracy: {deck_stats['overall_
             messagebox.showwarning("Warning", "Please select a deck")
             return
         
-        deck_name = self.decks_tree.item(selection[0])["text"]
-        decks = self.db.get_all_decks()
-        deck = next(d for d in decks if d["name"] == deck_name)
+        deck = self.db.get_deck(int(selection[0]))
+        deck_name = deck["name"]
         stats = self.db.get_deck_statistics(deck["id"])
         
         # Calculate reviewed count and averages from cards
@@ -428,6 +482,9 @@ Average Interval: {avg_interval:.1f} days
     
     def show_grammar_help(self):
         """Show grammar help using Ollama."""
+        if self.ollama_available is None:
+            messagebox.showinfo("Please Wait", "Still checking the Ollama connection")
+            return
         if not self.ollama_available:
             messagebox.showerror("Error", "Ollama is not available")
             return
@@ -464,6 +521,9 @@ Average Interval: {avg_interval:.1f} days
         status_label.pack(pady=5)
         
         def search_callback(result):
+            if not dialog.winfo_exists():
+                return
+            search_btn.config(state="normal")
             status_label.config(text="Ready", foreground="blue")
             if result:
                 results_text.config(state="normal")
@@ -479,25 +539,27 @@ Average Interval: {avg_interval:.1f} days
                 messagebox.showwarning("Warning", "Please enter a search term")
                 return
             
+            kind = search_type.get()
             status_label.config(text="Querying Ollama...", foreground="orange")
-            dialog.update()
+            search_btn.config(state="disabled")
             
-            query_helper = OllamaThreadedQuery(self.ollama_client)
+            def worker():
+                # Runs off the Tk thread; the result is handed back through root.after
+                if kind == "definition":
+                    result = self.ollama_client.define_word(query, language="Spanish")
+                    if result:
+                        result = (
+                            f"Definition of '{query}':\n\n"
+                            f"Definition: {result.get('definition', 'N/A')}\n"
+                            f"Part of Speech: {result.get('part_of_speech', 'N/A')}\n"
+                            f"Example: {result.get('example', 'N/A')}\n"
+                            f"Synonyms: {result.get('synonyms', 'N/A')}"
+                        )
+                else:
+                    result = self.ollama_client.explain_grammar(query, language="Spanish")
+                self.root.after(0, search_callback, result)
             
-            if search_type.get() == "definition":
-                query_helper.suggest_words_async(query, search_callback, language="Spanish")
-                # Actually get definition
-                result = self.ollama_client.define_word(query, language="Spanish")
-                if result:
-                    formatted = f"Definition of '{query}':\n\n"
-                    formatted += f"Definition: {result.get('definition', 'N/A')}\n"
-                    formatted += f"Part of Speech: {result.get('part_of_speech', 'N/A')}\n"
-                    formatted += f"Example: {result.get('example', 'N/A')}\n"
-                    formatted += f"Synonyms: {result.get('synonyms', 'N/A')}"
-                    search_callback(formatted)
-            else:
-                result = self.ollama_client.explain_grammar(query, language="Spanish")
-                search_callback(result)
+            threading.Thread(target=worker, daemon=True).start()
         
         # Buttons
         btn_frame = ttk.Frame(dialog)
@@ -511,6 +573,9 @@ Average Interval: {avg_interval:.1f} days
     
     def suggest_difficult_words(self):
         """Suggest difficult words from article text."""
+        if self.ollama_available is None:
+            messagebox.showinfo("Please Wait", "Still checking the Ollama connection")
+            return
         if not self.ollama_available:
             messagebox.showerror("Error", "Ollama is not available")
             return
@@ -529,6 +594,68 @@ Average Interval: {avg_interval:.1f} days
         status_label = ttk.Label(dialog, text="Ready", font=("Arial", 9), foreground="blue")
         status_label.pack(pady=5)
         
+        def save_cards(deck_id, pairs):
+            # Back on the Tk thread once every selected word has been defined
+            self.db.add_flashcards_bulk(deck_id, pairs)
+            if dialog.winfo_exists():
+                dialog.destroy()
+            if deck_id == self.current_deck_id and self.deck_stats_label.winfo_exists():
+                deck_stats = self.db.get_deck_statistics(deck_id)
+                self.deck_stats_label.config(text=self._deck_stats_text(deck_stats))
+            messagebox.showinfo("Success", f"Added {len(pairs)} cards to deck!")
+        
+        def show_suggestions(words):
+            if not dialog.winfo_exists():
+                return
+            analyze_btn.config(state="normal")
+            if not words:
+                status_label.config(text="Error analyzing text", foreground="red")
+                messagebox.showerror("Error", "Failed to get word suggestions")
+                return
+            
+            status_label.config(text=f"Found {len(words)} words", foreground="green")
+            # Show results
+            result_dialog = tk.Toplevel(dialog)
+            result_dialog.title("Suggested Words")
+            result_dialog.geometry("400x300")
+            
+            ttk.Label(result_dialog, text="Words to add to deck:", font=("Arial", 11, "bold")).pack(anchor="w", padx=10, pady=10)
+            
+            words_frame = ttk.Frame(result_dialog)
+            words_frame.pack(fill="both", expand=True, padx=10, pady=5)
+            
+            selected_words = {}
+            for word in words:
+                var = tk.BooleanVar(value=True)
+                selected_words[word] = var
+                ttk.Checkbutton(words_frame, text=word, variable=var).pack(anchor="w", pady=3)
+            
+            def add_selected_words():
+                words_to_add = [w for w, v in selected_words.items() if v.get()]
+                if not words_to_add:
+                    messagebox.showwarning("Warning", "Please select at least one word")
+                    return
+                
+                add_btn.config(state="disabled")
+                status_label.config(text=f"Defining {len(words_to_add)} words with Ollama...", foreground="orange")
+                deck_id = self.current_deck_id
+                
+                def worker():
+                    # One Ollama call per word, all off the Tk thread
+                    pairs = []
+                    for word in words_to_add:
+                        definition = self.ollama_client.define_word(word, language="Spanish")
+                        if definition:
+                            question = f"What does '{word}' mean?"
+                            answer = definition.get("definition", word)
+                            pairs.append((question, answer))
+                    self.root.after(0, save_cards, deck_id, pairs)
+                
+                threading.Thread(target=worker, daemon=True).start()
+            
+            add_btn = ttk.Button(result_dialog, text="Add Selected Words", command=add_selected_words, style="Large.TButton")
+            add_btn.pack(fill="x", padx=10, pady=10, ipady=8)
+        
         def analyze_text():
             text = text_input.get("1.0", "end").strip()
             if not text or len(text) < 50:
@@ -536,49 +663,13 @@ Average Interval: {avg_interval:.1f} days
                 return
             
             status_label.config(text="Analyzing with Ollama...", foreground="orange")
-            dialog.update()
+            analyze_btn.config(state="disabled")
             
-            words = self.ollama_client.suggest_difficult_words(text, difficulty_level="intermediate", language="Spanish")
+            def worker():
+                words = self.ollama_client.suggest_difficult_words(text, difficulty_level="intermediate", language="Spanish")
+                self.root.after(0, show_suggestions, words)
             
-            if words:
-                status_label.config(text=f"Found {len(words)} words", foreground="green")
-                # Show results
-                result_dialog = tk.Toplevel(dialog)
-                result_dialog.title("Suggested Words")
-                result_dialog.geometry("400x300")
-                
-                ttk.Label(result_dialog, text="Words to add to deck:", font=("Arial", 11, "bold")).pack(anchor="w", padx=10, pady=10)
-                
-                words_frame = ttk.Frame(result_dialog)
-                words_frame.pack(fill="both", expand=True, padx=10, pady=5)
-                
-                selected_words = {}
-                for word in words:
-                    var = tk.BooleanVar(value=True)
-                    selected_words[word] = var
-                    ttk.Checkbutton(words_frame, text=word, variable=var).pack(anchor="w", pady=3)
-                
-                def add_selected_words():
-                    words_to_add = [w for w, v in selected_words.items() if v.get()]
-                    if words_to_add:
-                        # Create cards for selected words
-                        for word in words_to_add:
-                            definition = self.ollama_client.define_word(word, language="Spanish")
-                            if definition:
-                                question = f"What does '{word}' mean?"
-                                answer = definition.get("definition", word)
-                                self.db.add_flashcard(self.current_deck_id, question, answer)
-                        
-                        messagebox.showinfo("Success", f"Added {len(words_to_add)} cards to deck!")
-                        dialog.destroy()
-                        result_dialog.destroy()
-                    else:
-                        messagebox.showwarning("Warning", "Please select at least one word")
-                
-                ttk.Button(result_dialog, text="Add Selected Words", command=add_selected_words, style="Large.TButton").pack(fill="x", padx=10, pady=10, ipady=8)
-            else:
-                status_label.config(text="Error analyzing text", foreground="red")
-                messagebox.showerror("Error", "Failed to get word suggestions")
+            threading.Thread(target=worker, daemon=True).start()
         
         # Buttons
         btn_frame = ttk.Frame(dialog)
@@ -599,13 +690,15 @@ Average Interval: {avg_interval:.1f} days
         
         deck_name = self.decks_tree.item(selection[0])["text"]
         if messagebox.askyesno("Confirm", f"Delete deck '{deck_name}' and all its cards?"):
-            decks = self.db.get_all_decks()
-            deck_id = next(d["id"] for d in decks if d["name"] == deck_name)
-            self.db.delete_deck(deck_id)
+            self.db.delete_deck(int(selection[0]))
             messagebox.showinfo("Success", "Deck deleted!")
+            self.refresh_decks()
     
     def open_study_center(self):
         """Open the Study Center."""
+        if self.study_gui is None:
+            from study_gui import StudyGUI
+            self.study_gui = StudyGUI(self.root, self.db, self.study_manager, self.ollama_available)
         self.study_gui.on_close = self.show_deck_selection  # Set return callback
         self.study_gui.show_study_center()
 
@@ -234,7 +234,7 @@ def cli_main():
                 print("✗ Invalid input")
 
         elif choice == "8":
-            return
+            break
 
         else:
             print("✗ Invalid choice")
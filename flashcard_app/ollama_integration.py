@@ -21,6 +21,10 @@ class OllamaClient:
         self.available = False
         self.available_models = []
         self.model = None
+        # requests.Session is not thread-safe, but urllib3's connection pool is: each thread
+        # gets its own Session, all mounted on one adapter so they share keep-alive connections
+        self._adapter = requests.adapters.HTTPAdapter(pool_maxsize=8) if HAS_REQUESTS else None
+        self._local = threading.local()
         self._check_connection()
         
         # If model specified, use it. Otherwise use first available.
@@ -32,6 +36,16 @@ class OllamaClient:
         else:
             print('[OLLAMA] No models available!')
     
+    @property
+    def session(self):
+        """HTTP session for the calling thread, backed by the client's shared connection pool."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+        return session
+    
     def _check_connection(self) -> bool:
         """Check if Ollama is running and accessible."""
         if not HAS_REQUESTS:
@@ -42,15 +56,20 @@ class OllamaClient:
         
         try:
             print('[OLLAMA] Checking connection to', self.base_url, flush=True)
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=2)
             if response.status_code == 200:
                 data = response.json()
                 self.available_models = [m["name"] for m in data.get("models", [])]
                 self.available = len(self.available_models) > 0
                 print(f'[OLLAMA] Found {len(self.available_models)} models: {self.available_models}', flush=True)
                 return True
-        except Exception as e:
-            print(f'[OLLAMA] Connection check failed: {str(e)}', flush=True)
+            print(f'[OLLAMA] Connection check got status {response.status_code}', flush=True)
+        except requests.exceptions.Timeout:
+            print('[OLLAMA] Connection check timed out after 2s', flush=True)
+            self.available = False
+        except (requests.exceptions.RequestException, ValueError, KeyError, TypeError, AttributeError) as e:
+            # Network failures, or a /api/tags payload that isn't the expected JSON
+            print(f'[OLLAMA] Connection check failed: {type(e).__name__}: {str(e)}', flush=True)
             self.available = False
         return False
     
@@ -69,6 +88,38 @@ class OllamaClient:
             return True
         return False
     
+    def preload_model(self, keep_alive: str = "30m", timeout: int = 120) -> bool:
+        """
+        Load the current model into memory so the first real prompt doesn't pay for it.
+        
+        Args:
+            keep_alive: How long Ollama should keep the model loaded afterwards
+            timeout: Request timeout in seconds (loading large models is slow)
+        
+        Returns:
+            True if Ollama confirmed the model is loaded
+        """
+        if not HAS_REQUESTS or not self.model:
+            return False
+        
+        try:
+            print(f'[OLLAMA] Preloading {self.model} (keep_alive={keep_alive})...', flush=True)
+            # A generate request without a prompt only loads the model
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": keep_alive},
+                timeout=timeout
+            )
+            if response.status_code != 200:
+                print(f'[OLLAMA] Preload got status {response.status_code}: {response.text}', flush=True)
+            return response.status_code == 200
+        except requests.exceptions.Timeout:
+            print(f'[OLLAMA] Preload timed out after {timeout}s', flush=True)
+            return False
+        except requests.exceptions.RequestException as e:
+            print(f'[OLLAMA] Preload failed: {type(e).__name__}: {str(e)}', flush=True)
+            return False
+    
     def explain_grammar(self, grammar_topic: str, example: str = None, language: str = "Spanish", timeout: int = 120) -> Optional[str]:
         """
         Get grammar explanation from Ollama.
@@ -237,7 +288,7 @@ Provide:
         
         try:
             print(f'[OLLAMA] Querying {self.model} with timeout {timeout}s...', flush=True)
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model,
@@ -346,12 +397,14 @@ class OllamaThreadedQuery:
 
 # Global client instance
 _ollama_client: Optional[OllamaClient] = None
+_ollama_client_lock = threading.Lock()
 
 def get_ollama_client(base_url: str = "http://localhost:11434", model: str = "llama2") -> OllamaClient:
     """Get or create the global Ollama client."""
     global _ollama_client
-    if _ollama_client is None:
-        _ollama_client = OllamaClient(base_url, model)
+    with _ollama_client_lock:
+        if _ollama_client is None:
+            _ollama_client = OllamaClient(base_url, model)
     return _ollama_client
 
 def is_ollama_available() -> bool:
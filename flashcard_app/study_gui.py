@@ -3,34 +3,45 @@ Study GUI - Interface for studying imported words and sentences.
 Allows users to add/edit definitions for words and view/generate explanations for sentences.
 """
 
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, scrolledtext
 from study_manager import StudyManager
 from database import FlashcardDatabase
-from ollama_integration import is_ollama_available
 from datetime import datetime
 
 
 class StudyGUI:
     """GUI for the study features."""
     
-    def __init__(self, root, db: FlashcardDatabase, study_manager: StudyManager):
-        """Initialize the Study GUI."""
+    def __init__(self, root, db: FlashcardDatabase, study_manager: StudyManager,
+                 ollama_available: bool = None):
+        """
+        Initialize the Study GUI.
+        
+        Args:
+            root: Tk root window shared with the main app
+            db: FlashcardDatabase instance
+            study_manager: StudyManager instance
+            ollama_available: The main app's Ollama probe result; None while it is still running
+        """
         self.root = root
         self.db = db
         self.study_manager = study_manager
-        self.ollama_available = is_ollama_available()
+        self.ollama_available = ollama_available
         
-        # Setup styles
+        # Setup styles (the base TButton/TLabel styles belong to the main app)
         self.style = ttk.Style()
-        self.style.configure("TButton", font=("Arial", 10), padding=8)
-        self.style.configure("Large.TButton", font=("Arial", 11), padding=12)
-        self.style.configure("TLabel", font=("Arial", 10))
         self.style.configure("Title.TLabel", font=("Arial", 14, "bold"))
         self.style.configure("Subtitle.TLabel", font=("Arial", 12, "bold"))
+        self.style.configure("FieldHeading.TLabel", font=("Arial", 9, "bold"))
         
         self.current_word_id = None
         self.current_sentence_id = None
+        self._generate_buttons = []
+        # Ollama-only widgets of the current view, removed if the probe finds Ollama offline
+        self._ollama_widgets = []
+        self._pending_selection = None
     
     def show_study_center(self):
         """Show the main study center screen."""
@@ -102,6 +113,7 @@ Study Languages:
     def show_words_view(self):
         """Show the words study view."""
         self.clear_window()
+        self.current_word_id = None
         
         frame = ttk.Frame(self.root, padding="20")
         frame.pack(fill="both", expand=True)
@@ -129,14 +141,11 @@ Study Languages:
         
         self.words_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, height=12, font=("Arial", 10))
         self.words_listbox.pack(side="left", fill="both", expand=True)
-        self.words_listbox.bind('<<ListboxSelect>>', self._on_word_selected)
+        self.words_listbox.bind('<<ListboxSelect>>', lambda e: self._schedule_selection(self._on_word_selected))
         scrollbar.config(command=self.words_listbox.yview)
         
-        # Populate listbox
-        for word_data in words:
-            status = "✓" if word_data['has_definition'] else "○"
-            display = f"{status} {word_data['word']}"
-            self.words_listbox.insert(tk.END, display)
+        # Populate listbox in a single Tk call
+        self.words_listbox.insert(tk.END, *(self._word_display(word_data) for word_data in words))
         
         self.words_data = words
         
@@ -165,7 +174,7 @@ Study Languages:
         self.word_label.pack(pady=3)
         
         # Top section - Definition only
-        ttk.Label(scrollable_frame, text="Definition:", font=("Arial", 9, "bold")).pack(anchor="w", pady=(5, 0))
+        ttk.Label(scrollable_frame, text="Definition:", style="FieldHeading.TLabel").pack(anchor="w", pady=(5, 0))
         self.word_definition_text = scrolledtext.ScrolledText(scrollable_frame, height=5, font=("Arial", 10), wrap="word")
         self.word_definition_text.pack(fill="both", pady=3)
         
@@ -187,24 +196,26 @@ Study Languages:
         self.word_notes_text = scrolledtext.ScrolledText(right_frame, height=3, font=("Arial", 9), wrap="word")
         self.word_notes_text.pack(fill="both", expand=True)
         
-        # Generation and action buttons in scrollable area
-        if self.ollama_available:
+        # Generation and action buttons in scrollable area (also shown while the
+        # Ollama probe is still running; _run_generation asks the user to wait)
+        if self.ollama_available is not False:
             gen_frame = ttk.LabelFrame(scrollable_frame, text="Generate Content:", padding="5")
             gen_frame.pack(fill="x", pady=5)
+            self._ollama_widgets.append(gen_frame)
             
-            ttk.Button(
+            self._add_generate_button(
                 gen_frame,
                 text="📋 Definition",
                 command=lambda: self._generate_word_content('definition')
             ).pack(side="left", padx=3, pady=3)
             
-            ttk.Button(
+            self._add_generate_button(
                 gen_frame,
                 text="📝 Explanation",
                 command=lambda: self._generate_word_content('explanation')
             ).pack(side="left", padx=3, pady=3)
             
-            ttk.Button(
+            self._add_generate_button(
                 gen_frame,
                 text="💬 Examples",
                 command=lambda: self._generate_word_content('examples')
@@ -223,7 +234,33 @@ Study Languages:
         
         ttk.Button(nav_frame, text="← Back to Study Center", command=self.show_study_center).pack(side="left", padx=5)
     
-    def _on_word_selected(self, event):
+    @staticmethod
+    def _word_display(word_data: dict) -> str:
+        """Listbox text for a word: status mark followed by the word."""
+        status = "✓" if word_data['has_definition'] else "○"
+        return f"{status} {word_data['word']}"
+    
+    @staticmethod
+    def _sentence_display(sent_data: dict) -> str:
+        """Listbox text for a sentence: status mark followed by the truncated sentence."""
+        status = "✓" if sent_data['has_explanation'] else "○"
+        return f"{status} {sent_data['sentence'][:70]}..."
+    
+    def _mark_list_item(self, listbox, items: list, item_id: int, flag: str, display):
+        """Mark a saved item as done in place, instead of rebuilding the whole view."""
+        for index, item in enumerate(items):
+            if item['id'] == item_id:
+                break
+        else:
+            return
+        if item[flag]:
+            return
+        item[flag] = True
+        listbox.delete(index)
+        listbox.insert(index, display(item))
+        listbox.selection_set(index)
+    
+    def _on_word_selected(self):
         """Handle word selection from listbox."""
         selection = self.words_listbox.curselection()
         if not selection:
@@ -231,6 +268,8 @@ Study Languages:
         
         index = selection[0]
         word_data = self.words_data[index]
+        if word_data['id'] == self.current_word_id:
+            return  # Already loaded; keep any unsaved edits
         self.current_word_id = word_data['id']
         
         # Update label
@@ -239,15 +278,10 @@ Study Languages:
         # Load existing definition
         definition = self.study_manager.get_word_definition(self.current_word_id)
         
-        self.word_definition_text.delete(1.0, tk.END)
-        self.word_examples_text.delete(1.0, tk.END)
-        self.word_notes_text.delete(1.0, tk.END)
-        
-        if definition:
-            self.word_definition_text.insert(tk.END, definition['definition'])
-            if definition['examples']:
-                self.word_examples_text.insert(tk.END, "\n".join(definition['examples']))
-            self.word_notes_text.insert(tk.END, definition['notes'])
+        definition = definition or {}
+        self._set_text(self.word_definition_text, definition.get('definition') or "")
+        self._set_text(self.word_examples_text, "\n".join(definition.get('examples') or []))
+        self._set_text(self.word_notes_text, definition.get('notes') or "")
     
     def _save_word_definition(self):
         """Save the word definition."""
@@ -274,15 +308,15 @@ Study Languages:
                 notes=notes
             )
             messagebox.showinfo("Success", "Definition saved!")
-            self.show_words_view()  # Refresh
+            self._mark_list_item(self.words_listbox, self.words_data, self.current_word_id,
+                                 'has_definition', self._word_display)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save: {str(e)}")
     
     def _clear_word_form(self):
         """Clear the word form."""
-        self.word_definition_text.delete(1.0, tk.END)
-        self.word_examples_text.delete(1.0, tk.END)
-        self.word_notes_text.delete(1.0, tk.END)
+        for text_widget in (self.word_definition_text, self.word_examples_text, self.word_notes_text):
+            self._set_text(text_widget, "")
     
     def _generate_word_definition(self):
         """Generate word definition using Ollama (legacy compatibility)."""
@@ -299,37 +333,30 @@ Study Languages:
             messagebox.showwarning("Warning", "Please select a word first")
             return
         
-        # Show loading
-        original_text = self.word_definition_text.get(1.0, tk.END)
-        self.word_definition_text.delete(1.0, tk.END)
-        
         type_display = {
             'definition': 'definition',
             'explanation': 'explanation',
             'examples': 'examples'
         }
         
-        self.word_definition_text.insert(tk.END, f"🔄 Generating {type_display.get(content_type, content_type)}...")
-        self.root.update()
-        
-        success, result = self.study_manager.generate_word_content(
-            self.current_word_id,
-            content_type=content_type,
-            language='native'
+        word_id = self.current_word_id
+        self._run_generation(
+            self.word_definition_text,
+            f"🔄 Generating {type_display.get(content_type, content_type)}...",
+            lambda: self.study_manager.generate_word_content(
+                word_id,
+                content_type=content_type,
+                language='native'
+            ),
+            lambda: self.current_word_id == word_id
         )
-        
-        self.word_definition_text.delete(1.0, tk.END)
-        if success:
-            self.word_definition_text.insert(tk.END, result)
-        else:
-            self.word_definition_text.insert(tk.END, original_text)
-            messagebox.showerror("Error", result)
     
     # ========== SENTENCES VIEW ==========
     
     def show_sentences_view(self):
         """Show the sentences study view."""
         self.clear_window()
+        self.current_sentence_id = None
         
         frame = ttk.Frame(self.root, padding="20")
         frame.pack(fill="both", expand=True)
@@ -357,14 +384,11 @@ Study Languages:
         
         self.sentences_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, height=10, font=("Arial", 9))
         self.sentences_listbox.pack(side="left", fill="both", expand=True)
-        self.sentences_listbox.bind('<<ListboxSelect>>', self._on_sentence_selected)
+        self.sentences_listbox.bind('<<ListboxSelect>>', lambda e: self._schedule_selection(self._on_sentence_selected))
         scrollbar.config(command=self.sentences_listbox.yview)
         
-        # Populate listbox
-        for sent_data in sentences:
-            status = "✓" if sent_data['has_explanation'] else "○"
-            display = f"{status} {sent_data['sentence'][:70]}..."
-            self.sentences_listbox.insert(tk.END, display)
+        # Populate listbox in a single Tk call
+        self.sentences_listbox.insert(tk.END, *(self._sentence_display(sent_data) for sent_data in sentences))
         
         self.sentences_data = sentences
         
@@ -389,7 +413,7 @@ Study Languages:
         scrollbar.pack(side="right", fill="y")
         
         # Sentence display (read-only) - more compact
-        ttk.Label(scrollable_frame, text="Sentence:", font=("Arial", 9, "bold")).pack(anchor="w", pady=(0, 3))
+        ttk.Label(scrollable_frame, text="Sentence:", style="FieldHeading.TLabel").pack(anchor="w", pady=(0, 3))
         self.sentence_display_text = scrolledtext.ScrolledText(scrollable_frame, height=2, font=("Arial", 10), wrap="word", state="disabled")
         self.sentence_display_text.pack(fill="x", pady=(0, 8))
         
@@ -416,7 +440,7 @@ Study Languages:
         self.focus_vars['all'].set(True)
         
         # Top section - Explanation only
-        ttk.Label(scrollable_frame, text="Explanation:", font=("Arial", 9, "bold")).pack(anchor="w", pady=(5, 0))
+        ttk.Label(scrollable_frame, text="Explanation:", style="FieldHeading.TLabel").pack(anchor="w", pady=(5, 0))
         self.sentence_explanation_text = scrolledtext.ScrolledText(scrollable_frame, height=5, font=("Arial", 10), wrap="word")
         self.sentence_explanation_text.pack(fill="both", pady=3)
         
@@ -442,12 +466,14 @@ Study Languages:
         action_frame = ttk.Frame(scrollable_frame)
         action_frame.pack(fill="x", pady=10)
         
-        if self.ollama_available:
-            ttk.Button(
+        if self.ollama_available is not False:
+            generate_btn = self._add_generate_button(
                 action_frame,
                 text="🤖 Generate Explanations",
                 command=self._generate_sentence_explanation_multi
-            ).pack(side="left", padx=5)
+            )
+            generate_btn.pack(side="left", padx=5)
+            self._ollama_widgets.append(generate_btn)
         
         ttk.Button(action_frame, text="Save", command=self._save_sentence_explanation).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Clear", command=self._clear_sentence_form).pack(side="left", padx=5)
@@ -458,7 +484,7 @@ Study Languages:
         
         ttk.Button(nav_frame, text="← Back to Study Center", command=self.show_study_center).pack(side="left", padx=5)
     
-    def _on_sentence_selected(self, event):
+    def _on_sentence_selected(self):
         """Handle sentence selection from listbox."""
         selection = self.sentences_listbox.curselection()
         if not selection:
@@ -466,29 +492,25 @@ Study Languages:
         
         index = selection[0]
         sent_data = self.sentences_data[index]
+        if sent_data['id'] == self.current_sentence_id:
+            return  # Already loaded; keep any unsaved edits
         self.current_sentence_id = sent_data['id']
         
         # Update sentence display
-        self.sentence_display_text.config(state="normal")
-        self.sentence_display_text.delete(1.0, tk.END)
-        self.sentence_display_text.insert(tk.END, sent_data['sentence'])
-        self.sentence_display_text.config(state="disabled")
+        self._set_text(self.sentence_display_text, sent_data['sentence'])
         
         # Load existing explanation
         explanation = self.study_manager.get_sentence_explanation(self.current_sentence_id)
         
-        self.sentence_explanation_text.delete(1.0, tk.END)
-        self.sentence_grammar_text.delete(1.0, tk.END)
-        self.sentence_notes_text.delete(1.0, tk.END)
+        self._set_text(self.sentence_explanation_text, (explanation or {}).get('explanation') or "")
+        self._set_text(self.sentence_grammar_text, (explanation or {}).get('grammar_notes') or "")
+        self._set_text(self.sentence_notes_text, (explanation or {}).get('user_notes') or "")
         
         # Reset checkboxes
         for focus in self.focus_vars:
             self.focus_vars[focus].set(False)
         
         if explanation:
-            self.sentence_explanation_text.insert(tk.END, explanation['explanation'])
-            self.sentence_grammar_text.insert(tk.END, explanation['grammar_notes'])
-            self.sentence_notes_text.insert(tk.END, explanation['user_notes'])
             # Set checkbox for the focus area if stored
             if explanation.get('focus_area') and explanation['focus_area'] in self.focus_vars:
                 self.focus_vars[explanation['focus_area']].set(True)
@@ -530,15 +552,15 @@ Study Languages:
                 user_notes=user_notes
             )
             messagebox.showinfo("Success", "Explanation saved!")
-            self.show_sentences_view()  # Refresh
+            self._mark_list_item(self.sentences_listbox, self.sentences_data, self.current_sentence_id,
+                                 'has_explanation', self._sentence_display)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save: {str(e)}")
     
     def _clear_sentence_form(self):
         """Clear the sentence form."""
-        self.sentence_explanation_text.delete(1.0, tk.END)
-        self.sentence_grammar_text.delete(1.0, tk.END)
-        self.sentence_notes_text.delete(1.0, tk.END)
+        for text_widget in (self.sentence_explanation_text, self.sentence_grammar_text, self.sentence_notes_text):
+            self._set_text(text_widget, "")
     
     def _generate_sentence_explanation(self):
         """Generate sentence explanation using Ollama (legacy - single focus area)."""
@@ -546,29 +568,12 @@ Study Languages:
             messagebox.showwarning("Warning", "Please select a sentence first")
             return
         
-        # Show loading
-        original_text = self.sentence_explanation_text.get(1.0, tk.END)
-        self.sentence_explanation_text.delete(1.0, tk.END)
-        self.sentence_explanation_text.insert(tk.END, "🔄 Generating explanation...")
-        self.root.update()
-        
         # Get selected focus areas
         selected_focus_areas = [focus for focus, var in self.focus_vars.items() if var.get()]
         if not selected_focus_areas:
             selected_focus_areas = ['all']
         
-        success, result = self.study_manager.generate_sentence_explanation(
-            self.current_sentence_id,
-            language='native',
-            focus_areas=selected_focus_areas
-        )
-        
-        self.sentence_explanation_text.delete(1.0, tk.END)
-        if success:
-            self.sentence_explanation_text.insert(tk.END, result)
-        else:
-            self.sentence_explanation_text.insert(tk.END, original_text)
-            messagebox.showerror("Error", result)
+        self._generate_sentence(selected_focus_areas, "🔄 Generating explanation...")
     
     def _generate_sentence_explanation_multi(self):
         """Generate sentence explanation for multiple selected focus areas using Ollama."""
@@ -583,24 +588,130 @@ Study Languages:
             messagebox.showwarning("Warning", "Please select at least one focus area")
             return
         
-        # Show loading
-        original_text = self.sentence_explanation_text.get(1.0, tk.END)
-        self.sentence_explanation_text.delete(1.0, tk.END)
-        self.sentence_explanation_text.insert(tk.END, f"🔄 Generating explanations for {', '.join(selected_focus_areas)}...")
-        self.root.update()
-        
-        success, result = self.study_manager.generate_sentence_explanation(
-            self.current_sentence_id,
-            language='native',
-            focus_areas=selected_focus_areas
+        self._generate_sentence(
+            selected_focus_areas,
+            f"🔄 Generating explanations for {', '.join(selected_focus_areas)}..."
         )
+    
+    def _generate_sentence(self, focus_areas: list, loading_text: str):
+        """Generate an explanation of the current sentence for the given focus areas."""
+        sentence_id = self.current_sentence_id
+        self._run_generation(
+            self.sentence_explanation_text,
+            loading_text,
+            lambda: self.study_manager.generate_sentence_explanation(
+                sentence_id,
+                language='native',
+                focus_areas=focus_areas
+            ),
+            lambda: self.current_sentence_id == sentence_id
+        )
+    
+    def _schedule_selection(self, handler):
+        """
+        Run a listbox selection handler once the selection settles.
         
-        self.sentence_explanation_text.delete(1.0, tk.END)
-        if success:
-            self.sentence_explanation_text.insert(tk.END, result)
-        else:
-            self.sentence_explanation_text.insert(tk.END, original_text)
-            messagebox.showerror("Error", result)
+        Holding an arrow key fires <<ListboxSelect>> for every row passed;
+        only the last one within 150 ms reloads the editor.
+        
+        Args:
+            handler: Callable that reads the listbox selection and loads the item
+        """
+        if self._pending_selection is not None:
+            self.root.after_cancel(self._pending_selection)
+        self._pending_selection = self.root.after(150, self._run_selection, handler)
+    
+    def _run_selection(self, handler):
+        """Fire a debounced selection handler."""
+        self._pending_selection = None
+        handler()
+    
+    # ========== BACKGROUND GENERATION ==========
+    
+    def _set_text(self, text_widget, text: str):
+        """
+        Replace the contents of a Text widget, keeping its state.
+        
+        Args:
+            text_widget: Text widget to update; read-only widgets stay read-only
+            text: New contents; nothing is redrawn if they already match
+        """
+        if text_widget.get(1.0, "end-1c") == text:
+            return
+        read_only = str(text_widget.cget("state")) == "disabled"
+        if read_only:
+            text_widget.config(state="normal")
+        text_widget.delete(1.0, tk.END)
+        text_widget.insert(tk.END, text)
+        if read_only:
+            text_widget.config(state="disabled")
+    
+    def _add_generate_button(self, parent, **kwargs) -> ttk.Button:
+        """Create a button that starts an Ollama generation, so it can be disabled while one runs."""
+        button = ttk.Button(parent, **kwargs)
+        self._generate_buttons.append(button)
+        return button
+    
+    def set_ollama_available(self, available: bool):
+        """
+        Apply the main app's Ollama probe result to the view on screen.
+        
+        Args:
+            available: Whether Ollama answered; if not, the generation controls are removed
+        """
+        self.ollama_available = available
+        if not available:
+            for widget in self._ollama_widgets:
+                if widget.winfo_exists():
+                    widget.destroy()
+            self._ollama_widgets = []
+    
+    def _set_generate_buttons_state(self, state: str):
+        """Enable or disable the generation buttons of the current view."""
+        for button in self._generate_buttons:
+            if button.winfo_exists():
+                button.config(state=state)
+    
+    def _run_generation(self, text_widget, loading_text: str, generate, is_current):
+        """
+        Run an Ollama generation on a worker thread and show its result.
+        
+        Args:
+            text_widget: Text widget that shows the loading message and then the result
+            loading_text: Message shown while the request is running
+            generate: Callable returning (success, result); runs off the Tk thread
+            is_current: Callable telling whether the same item is still selected
+        """
+        if self.ollama_available is None:
+            messagebox.showinfo("Please Wait", "Still checking the Ollama connection")
+            return
+        if not self.ollama_available:
+            messagebox.showerror("Error", "Ollama is not available")
+            return
+        
+        original_text = text_widget.get(1.0, "end-1c")
+        self._set_text(text_widget, loading_text)
+        self._set_generate_buttons_state("disabled")
+        
+        def finish(success, result):
+            self._set_generate_buttons_state("normal")
+            # The user may have left the view or picked another item in the meantime
+            if not text_widget.winfo_exists() or not is_current():
+                return
+            if success:
+                self._set_text(text_widget, result)
+            else:
+                self._set_text(text_widget, original_text)
+                messagebox.showerror("Error", result)
+        
+        def worker():
+            try:
+                success, result = generate()
+            except Exception as e:
+                success, result = False, f"Error: {str(e)}"
+            self.root.after(0, finish, success, result)
+        
+        threading.Thread(target=worker, daemon=True).start()
     
     # ========== SETTINGS ==========
     
@@ -730,6 +841,11 @@ Study Languages:
     
     def clear_window(self):
         """Clear all widgets from the window."""
+        self._generate_buttons = []
+        self._ollama_widgets = []
+        if self._pending_selection is not None:
+            self.root.after_cancel(self._pending_selection)
+            self._pending_selection = None
         for widget in self.root.winfo_children():
             widget.destroy()
     
@@ -11,12 +11,41 @@ Features:
 """
 
 import json
+import sqlite3
 from datetime import datetime
 from typing import Optional, List, Dict, Tuple
-from database import FlashcardDatabase
+from database import FlashcardDatabase, _HAS_RETURNING
 from ollama_integration import OllamaClient, OllamaThreadedQuery
 from prompts import WORD_PROMPTS, SENTENCE_PROMPTS
 
+_SQL_GET_CONTENT = "SELECT content FROM imported_content WHERE id = ?"
+_SQL_UPSERT_DEFINITION = """
+    INSERT INTO word_definitions
+    (imported_content_id, word, definition, definition_language, created_at, last_updated, examples, notes, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(imported_content_id, definition_language) DO UPDATE SET
+        definition = excluded.definition,
+        last_updated = excluded.last_updated,
+        examples = excluded.examples,
+        notes = excluded.notes"""
+
+# Column lists aliased to the dict keys callers use, so rows convert with dict(row)
+_SQL_DEFINITION_FIELDS = """
+    SELECT id, word, definition, definition_language AS language, created_at, last_updated,
+           examples, notes, difficulty_level, source
+    FROM word_definitions"""
+_SQL_EXPLANATION_FIELDS = """
+    SELECT id, sentence, explanation, explanation_language AS language, focus_area,
+           grammar_notes, user_notes, created_at, last_updated, source
+    FROM sentence_explanations"""
+
+
+def _definition_from_row(row: sqlite3.Row) -> Dict:
+    """Convert a word_definitions row into a dict, decoding the stored examples list."""
+    definition = dict(row)
+    definition['examples'] = json.loads(definition['examples']) if definition['examples'] else []
+    return definition
+
 
 class StudyManager:
     """Manages study resources for imported words and sentences."""
@@ -32,6 +61,12 @@ class StudyManager:
         self.db = db
         self.ollama_client = ollama_client
         
+        # All settings are read in one query and served from memory afterwards;
+        # _set_setting keeps this copy in step with the table
+        self._settings = dict(
+            self.db.conn.execute("SELECT setting_key, setting_value FROM study_settings")
+        )
+        
         # Get user preferences
         self.native_language = self._get_setting('native_language', 'English')
         self.study_language = self._get_setting('study_language', 'Spanish')
@@ -44,19 +79,18 @@ class StudyManager:
     
     def _get_setting(self, key: str, default: str = '') -> str:
         """Get a study setting value."""
-        cursor = self.db.conn.cursor()
-        cursor.execute("SELECT setting_value FROM study_settings WHERE setting_key = ?", (key,))
-        result = cursor.fetchone()
-        return result[0] if result else default
+        return self._settings.get(key, default)
     
     def _set_setting(self, key: str, value: str):
         """Set a study setting value."""
         cursor = self.db.conn.cursor()
         cursor.execute(
-            "INSERT OR REPLACE INTO study_settings (setting_key, setting_value) VALUES (?, ?)",
+            "INSERT INTO study_settings (setting_key, setting_value) VALUES (?, ?) "
+            "ON CONFLICT(setting_key) DO UPDATE SET setting_value = excluded.setting_value",
             (key, value)
         )
         self.db.conn.commit()
+        self._settings[key] = value
     
     def set_native_language(self, language: str):
         """Set the user's native language."""
@@ -187,9 +221,10 @@ class StudyManager:
     def get_imported_words(self) -> List[Dict]:
         """Get all imported words with their definition status."""
         cursor = self.db.conn.cursor()
+        cursor.row_factory = sqlite3.Row
         cursor.execute("""
-            SELECT ic.id, ic.content, ic.url, ic.title, ic.created_at, ic.language,
-                   COUNT(wd.id) as has_definition
+            SELECT ic.id, ic.content AS word, ic.url, ic.title, ic.created_at, ic.language,
+                   COUNT(wd.id) > 0 AS has_definition
             FROM imported_content ic
             LEFT JOIN word_definitions wd ON ic.id = wd.imported_content_id
             WHERE ic.content_type = 'word'
@@ -198,24 +233,20 @@ class StudyManager:
         """)
         
         words = []
-        for row in cursor.fetchall():
-            words.append({
-                'id': row[0],
-                'word': row[1],
-                'url': row[2],
-                'title': row[3],
-                'created_at': row[4],
-                'language': row[5] or self.study_language,
-                'has_definition': row[6] > 0
-            })
+        for row in cursor:
+            word = dict(row)
+            word['language'] = word['language'] or self.study_language
+            word['has_definition'] = bool(word['has_definition'])
+            words.append(word)
         return words
     
     def get_imported_sentences(self) -> List[Dict]:
         """Get all imported sentences with their explanation status."""
         cursor = self.db.conn.cursor()
+        cursor.row_factory = sqlite3.Row
         cursor.execute("""
-            SELECT ic.id, ic.content, ic.url, ic.title, ic.created_at, ic.language,
-                   COUNT(se.id) as has_explanation
+            SELECT ic.id, ic.content AS sentence, ic.url, ic.title, ic.created_at, ic.language,
+                   COUNT(se.id) > 0 AS has_explanation
             FROM imported_content ic
             LEFT JOIN sentence_explanations se ON ic.id = se.imported_content_id
             WHERE ic.content_type = 'sentence'
@@ -224,16 +255,11 @@ class StudyManager:
         """)
         
         sentences = []
-        for row in cursor.fetchall():
-            sentences.append({
-                'id': row[0],
-                'sentence': row[1],
-                'url': row[2],
-                'title': row[3],
-                'created_at': row[4],
-                'language': row[5] or self.study_language,
-                'has_explanation': row[6] > 0
-            })
+        for row in cursor:
+            sentence = dict(row)
+            sentence['language'] = sentence['language'] or self.study_language
+            sentence['has_explanation'] = bool(sentence['has_explanation'])
+            sentences.append(sentence)
         return sentences
     
     # ========== WORD DEFINITIONS ==========
@@ -257,43 +283,35 @@ class StudyManager:
         Returns:
             The word_definitions ID
         """
-        cursor = self.db.conn.cursor()
-        
-        # Get the word from imported_content
-        cursor.execute("SELECT content FROM imported_content WHERE id = ?", (imported_content_id,))
-        result = cursor.fetchone()
-        if not result:
-            raise ValueError(f"No imported content found with ID {imported_content_id}")
-        
-        word = result[0]
-        now = datetime.now().isoformat()
-        examples_json = json.dumps(examples or [])
-        
-        # Check if definition already exists for this language
-        cursor.execute(
-            "SELECT id FROM word_definitions WHERE imported_content_id = ? AND definition_language = ?",
-            (imported_content_id, definition_language)
-        )
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing
-            cursor.execute("""
-                UPDATE word_definitions 
-                SET definition = ?, last_updated = ?, examples = ?, notes = ?
-                WHERE id = ?
-            """, (definition, now, examples_json, notes, existing[0]))
-            definition_id = existing[0]
-        else:
-            # Insert new
-            cursor.execute("""
-                INSERT INTO word_definitions 
-                (imported_content_id, word, definition, definition_language, created_at, last_updated, examples, notes, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (imported_content_id, word, definition, definition_language, now, now, examples_json, notes, 'user'))
-            definition_id = cursor.lastrowid
+        conn = self.db.conn
+        with conn:
+            # Take the write lock up front so the word lookup and the upsert see the same state
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            
+            # Get the word from imported_content
+            cursor.execute(_SQL_GET_CONTENT, (imported_content_id,))
+            result = cursor.fetchone()
+            if not result:
+                raise ValueError(f"No imported content found with ID {imported_content_id}")
+            
+            word = result[0]
+            now = datetime.now().isoformat()
+            examples_json = json.dumps(examples or [])
+            
+            # Insert, or update the existing definition for this language
+            params = (imported_content_id, word, definition, definition_language, now, now, examples_json, notes, 'user')
+            if _HAS_RETURNING:
+                cursor.execute(_SQL_UPSERT_DEFINITION + " RETURNING id", params)
+                definition_id = cursor.fetchone()[0]
+            else:
+                cursor.execute(_SQL_UPSERT_DEFINITION, params)
+                cursor.execute(
+                    "SELECT id FROM word_definitions WHERE imported_content_id = ? AND definition_language = ?",
+                    (imported_content_id, definition_language)
+                )
+                definition_id = cursor.fetchone()[0]
         
-        self.db.conn.commit()
         return definition_id
     
     def get_word_definition(self, imported_content_id: int, 
@@ -312,10 +330,9 @@ class StudyManager:
             language = 'native' if self.prefer_native_definitions else self.study_language
         
         cursor = self.db.conn.cursor()
-        cursor.execute("""
-            SELECT id, word, definition, definition_language, created_at, last_updated, 
-                   examples, notes, difficulty_level, source
-            FROM word_definitions
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"""
+            {_SQL_DEFINITION_FIELDS}
             WHERE imported_content_id = ? AND definition_language = ?
         """, (imported_content_id, language))
         
@@ -323,45 +340,19 @@ class StudyManager:
         if not row:
             return None
         
-        return {
-            'id': row[0],
-            'word': row[1],
-            'definition': row[2],
-            'language': row[3],
-            'created_at': row[4],
-            'last_updated': row[5],
-            'examples': json.loads(row[6]) if row[6] else [],
-            'notes': row[7],
-            'difficulty_level': row[8],
-            'source': row[9]
-        }
+        return _definition_from_row(row)
     
     def get_all_word_definitions(self, imported_content_id: int) -> List[Dict]:
         """Get all definitions for a word in all languages."""
         cursor = self.db.conn.cursor()
-        cursor.execute("""
-            SELECT id, word, definition, definition_language, created_at, last_updated,
-                   examples, notes, difficulty_level, source
-            FROM word_definitions
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"""
+            {_SQL_DEFINITION_FIELDS}
             WHERE imported_content_id = ?
             ORDER BY definition_language
         """, (imported_content_id,))
         
-        definitions = []
-        for row in cursor.fetchall():
-            definitions.append({
-                'id': row[0],
-                'word': row[1],
-                'definition': row[2],
-                'language': row[3],
-                'created_at': row[4],
-                'last_updated': row[5],
-                'examples': json.loads(row[6]) if row[6] else [],
-                'notes': row[7],
-                'difficulty_level': row[8],
-                'source': row[9]
-            })
-        return definitions
+        return [_definition_from_row(row) for row in cursor]
     
     def generate_word_content(self, imported_content_id: int, 
                              content_type: str = 'definition',
@@ -381,7 +372,7 @@ class StudyManager:
             return False, "Ollama is not available"
         
         cursor = self.db.conn.cursor()
-        cursor.execute("SELECT content FROM imported_content WHERE id = ?", (imported_content_id,))
+        cursor.execute(_SQL_GET_CONTENT, (imported_content_id,))
         result = cursor.fetchone()
         if not result:
             return False, "Word not found"
@@ -460,43 +451,47 @@ class StudyManager:
         Returns:
             The sentence_explanations ID
         """
-        cursor = self.db.conn.cursor()
-        
-        # Get the sentence from imported_content
-        cursor.execute("SELECT content FROM imported_content WHERE id = ?", (imported_content_id,))
-        result = cursor.fetchone()
-        if not result:
-            raise ValueError(f"No imported content found with ID {imported_content_id}")
-        
-        sentence = result[0]
-        now = datetime.now().isoformat()
-        
-        # Insert or update
-        cursor.execute(
-            "SELECT id FROM sentence_explanations WHERE imported_content_id = ? AND explanation_language = ?",
-            (imported_content_id, explanation_language)
-        )
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute("""
-                UPDATE sentence_explanations
-                SET explanation = ?, focus_area = ?, grammar_notes = ?, 
-                    user_notes = ?, last_updated = ?
-                WHERE id = ?
-            """, (explanation, focus_area, grammar_notes, user_notes, now, existing[0]))
-            explanation_id = existing[0]
-        else:
-            cursor.execute("""
-                INSERT INTO sentence_explanations
-                (imported_content_id, sentence, explanation, explanation_language, 
-                 focus_area, grammar_notes, user_notes, created_at, last_updated, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (imported_content_id, sentence, explanation, explanation_language,
-                  focus_area, grammar_notes, user_notes, now, now, 'user'))
-            explanation_id = cursor.lastrowid
+        conn = self.db.conn
+        with conn:
+            # Take the write lock before the existence check so a concurrent save
+            # cannot slip in between the SELECT and the INSERT
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            
+            # Get the sentence from imported_content
+            cursor.execute(_SQL_GET_CONTENT, (imported_content_id,))
+            result = cursor.fetchone()
+            if not result:
+                raise ValueError(f"No imported content found with ID {imported_content_id}")
+            
+            sentence = result[0]
+            now = datetime.now().isoformat()
+            
+            # Insert or update
+            cursor.execute(
+                "SELECT id FROM sentence_explanations WHERE imported_content_id = ? AND explanation_language = ?",
+                (imported_content_id, explanation_language)
+            )
+            existing = cursor.fetchone()
+            
+            if existing:
+                cursor.execute("""
+                    UPDATE sentence_explanations
+                    SET explanation = ?, focus_area = ?, grammar_notes = ?, 
+                        user_notes = ?, last_updated = ?
+                    WHERE id = ?
+                """, (explanation, focus_area, grammar_notes, user_notes, now, existing[0]))
+                explanation_id = existing[0]
+            else:
+                cursor.execute("""
+                    INSERT INTO sentence_explanations
+                    (imported_content_id, sentence, explanation, explanation_language, 
+                     focus_area, grammar_notes, user_notes, created_at, last_updated, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (imported_content_id, sentence, explanation, explanation_language,
+                      focus_area, grammar_notes, user_notes, now, now, 'user'))
+                explanation_id = cursor.lastrowid
         
-        self.db.conn.commit()
         return explanation_id
     
     def get_sentence_explanation(self, imported_content_id: int,
@@ -515,10 +510,9 @@ class StudyManager:
             language = 'native' if self.prefer_native_explanations else self.study_language
         
         cursor = self.db.conn.cursor()
-        cursor.execute("""
-            SELECT id, sentence, explanation, explanation_language, focus_area,
-                   grammar_notes, user_notes, created_at, last_updated, source
-            FROM sentence_explanations
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"""
+            {_SQL_EXPLANATION_FIELDS}
             WHERE imported_content_id = ? AND explanation_language = ?
         """, (imported_content_id, language))
         
@@ -526,45 +520,19 @@ class StudyManager:
         if not row:
             return None
         
-        return {
-            'id': row[0],
-            'sentence': row[1],
-            'explanation': row[2],
-            'language': row[3],
-            'focus_area': row[4],
-            'grammar_notes': row[5],
-            'user_notes': row[6],
-            'created_at': row[7],
-            'last_updated': row[8],
-            'source': row[9]
-        }
+        return dict(row)
     
     def get_all_sentence_explanations(self, imported_content_id: int) -> List[Dict]:
         """Get all explanations for a sentence in all languages."""
         cursor = self.db.conn.cursor()
-        cursor.execute("""
-            SELECT id, sentence, explanation, explanation_language, focus_area,
-                   grammar_notes, user_notes, created_at, last_updated, source
-            FROM sentence_explanations
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"""
+            {_SQL_EXPLANATION_FIELDS}
             WHERE imported_content_id = ?
             ORDER BY explanation_language
         """, (imported_content_id,))
         
-        explanations = []
-        for row in cursor.fetchall():
-            explanations.append({
-                'id': row[0],
-                'sentence': row[1],
-                'explanation': row[2],
-                'language': row[3],
-                'focus_area': row[4],
-                'grammar_notes': row[5],
-                'user_notes': row[6],
-                'created_at': row[7],
-                'last_updated': row[8],
-                'source': row[9]
-            })
-        return explanations
+        return [dict(row) for row in cursor]
     
     def generate_sentence_explanation(self, imported_content_id: int,
                                      language: str = 'native',
@@ -587,7 +555,7 @@ class StudyManager:
             focus_areas = ['all']
         
         cursor = self.db.conn.cursor()
-        cursor.execute("SELECT content FROM imported_content WHERE id = ?", (imported_content_id,))
+        cursor.execute(_SQL_GET_CONTENT, (imported_content_id,))
         result = cursor.fetchone()
         if not result:
             return False, "Sentence not found"
@@ -634,8 +602,6 @@ class StudyManager:
                 return False, "Failed to generate explanations"
         except Exception as e:
             return False, f"Error: {str(e)}"
-        except Exception as e:
-            return False, f"Error: {str(e)}"
     
     # ========== STUDY STATISTICS ==========
     